@@ -69,10 +69,14 @@ deprecatedWorkerModuleAttribute(
     compat_name="LatentBuildSlaveFailedToSubstantiate")
 
 
-class LatentWorkerSubstantiatiationCancelled(Exception):
+class LatentWorkerSubstantiationCancelled(Exception):
     pass
 
 
+# backward compatibility name, kept because of the historical typo
+LatentWorkerSubstantiatiationCancelled = LatentWorkerSubstantiationCancelled
+
+
 class IPlugin(Interface):
 
     """
@@ -257,9 +261,6 @@ class IProperties(Interface):
         @returns: boolean
         """
 
-    def has_key(name):
-        """Deprecated name for L{hasProperty}."""
-
     def setProperty(name, value, source, runtime=False):
         """Set the given property, overwriting any existing value.  The source
         describes the source of the value for human interpretation.
@@ -1076,12 +1077,13 @@ class IHttpResponse(Interface):
         """
         :returns: raw (``bytes``) content of the response via deferred
         """
+
     def json():
         """
         :returns: json decoded content of the response via deferred
         """
-    master = Attribute('code',
-                       "http status code of the request's response (e.g 200)")
+    code = Attribute('code',
+                     "http status code of the request's response (e.g 200)")
 
 
 class IConfigurator(Interface):
@@ -21,6 +21,7 @@ from future.utils import iteritems
 import collections
 import json
 import re
+import warnings
 import weakref
 
 from twisted.internet import defer
@@ -188,7 +189,10 @@ class Properties(util.ComparableMixin):
     def hasProperty(self, name):
         return name in self.properties
 
-    has_key = hasProperty
+    def has_key(self, name):
+        warnings.warn("Properties.has_key is deprecated, use hasProperty "
+                      "instead", DeprecationWarning, stacklevel=2)
+        return self.hasProperty(name)
 
     def setProperty(self, name, value, source, runtime=False):
         name = util.bytes2unicode(name)
@@ -247,7 +251,10 @@ class PropertiesMixin(object):
         props = IProperties(self)
         return props.hasProperty(propname)
 
-    has_key = hasProperty
+    def has_key(self, propname):
+        warnings.warn("has_key is deprecated, use hasProperty instead",
+                      DeprecationWarning, stacklevel=2)
+        return self.hasProperty(propname)
 
     def setProperty(self, propname, value, source='Unknown', runtime=None):
         # source is not optional in IProperties, but is optional here to avoid
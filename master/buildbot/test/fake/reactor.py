@@ -126,8 +126,7 @@ class TestReactor(NonReactor, CoreReactor, Clock):
 
     def _executeCurrentDelayedCalls(self):
         while self.getDelayedCalls():
-            first = sorted(self.getDelayedCalls(),
-                           key=lambda a: a.getTime())[0]
+            first = min(self.getDelayedCalls(), key=lambda a: a.getTime())
             if first.getTime() > self.seconds():
                 break
             self.advance(0)
@@ -151,7 +150,7 @@ class TestReactor(NonReactor, CoreReactor, Clock):
     def stop(self):
         # first fire pending calls
         while self.getDelayedCalls():
-            last = sorted(self.getDelayedCalls(), key=lambda a: a.getTime())[-1]
+            last = max(self.getDelayedCalls(), key=lambda a: a.getTime())
             self.advance(last.getTime() - self.seconds())
 
         # then, fire the shutdown event
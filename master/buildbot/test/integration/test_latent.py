@@ -15,9 +15,9 @@
 
 from __future__ import absolute_import
 from __future__ import print_function
-from future.builtins import range
 
 import os
+from operator import itemgetter
 
 from twisted.internet import defer
 from twisted.python import log
@@ -28,7 +28,7 @@ from twisted.trial.unittest import SynchronousTestCase
 from buildbot.config import BuilderConfig
 from buildbot.interfaces import LatentWorkerCannotSubstantiate
 from buildbot.interfaces import LatentWorkerFailedToSubstantiate
-from buildbot.interfaces import LatentWorkerSubstantiatiationCancelled
+from buildbot.interfaces import LatentWorkerSubstantiationCancelled
 from buildbot.process.buildstep import BuildStep
 from buildbot.process.factory import BuildFactory
 from buildbot.process.properties import Interpolate
@@ -46,6 +46,16 @@ from buildbot.test.util.misc import enable_trace
 from buildbot.util.eventual import _setReactor
 
 
+# sourcestamps of the buildsets created by the tests, never modified
+SOURCESTAMPS = (
+    {'codebase': '',
+     'repository': '',
+     'branch': None,
+     'revision': None,
+     'project': ''},
+)
+
+
 class TestException(Exception):
 
     """
@@ -62,22 +72,22 @@ class Tests(SynchronousTestCase):
         _setReactor(self.reactor)
         self.addCleanup(_setReactor, None)
 
-        # to ease debugging we display the error logs in the test log
-        origAddCompleteLog = BuildStep.addCompleteLog
+        if 'BBTRACE' in os.environ:
+            # to ease debugging we display the error logs in the test log
+            origAddCompleteLog = BuildStep.addCompleteLog
 
-        def addCompleteLog(self, name, _log):
-            if name.endswith("err.text"):
-                log.msg("got error log!", name, _log)
-            return origAddCompleteLog(self, name, _log)
-        self.patch(BuildStep, "addCompleteLog", addCompleteLog)
+            def addCompleteLog(self, name, _log):
+                if name.endswith("err.text"):
+                    log.msg("got error log!", name, _log)
+                return origAddCompleteLog(self, name, _log)
+            self.patch(BuildStep, "addCompleteLog", addCompleteLog)
 
-        if 'BBTRACE' in os.environ:
             enable_trace(self, ["twisted", "worker_transition.py", "util/tu", "util/path",
                                 "log.py", "/mq/", "/db/", "buildbot/data/", "fake/reactor.py"])
 
     def tearDown(self):
         # Flush the errors logged by the master stop cancelling the builds.
-        self.flushLoggedErrors(LatentWorkerSubstantiatiationCancelled)
+        self.flushLoggedErrors(LatentWorkerSubstantiationCancelled)
         self.assertFalse(self.master.running, "master is still running!")
 
     def getMaster(self, config_dict):
@@ -85,23 +95,78 @@ class Tests(SynchronousTestCase):
             getMaster(self, self.reactor, config_dict))
         return master
 
-    def createBuildrequest(self, master, builder_ids, properties=None):
-        properties = properties.asDict() if properties is not None else None
+    def getLatentMaster(self, controllers, builder_names=('testy',),
+                        steps=None):
+        """
+        Create a started master with one builder for each of
+        ``builder_names``, all of them using the latent workers of
+        ``controllers``.
+        """
+        workernames = [controller.worker.name for controller in controllers]
+        config_dict = {
+            'builders': [
+                BuilderConfig(name=name,
+                              workernames=workernames,
+                              factory=BuildFactory(steps),
+                              )
+                for name in builder_names
+            ],
+            'workers': [controller.worker for controller in controllers],
+            'protocols': {'null': {}},
+            # Disable checks about missing scheduler.
+            'multiMaster': True,
+        }
+        return self.getMaster(config_dict)
+
+    def getBuilderId(self, master, name='testy'):
         return self.successResultOf(
-            master.data.updates.addBuildset(
-                waited_for=False,
-                builderids=builder_ids,
-                sourcestamps=[
-                    {'codebase': '',
-                     'repository': '',
-                     'branch': None,
-                     'revision': None,
-                     'project': ''},
-                ],
-                properties=properties,
-            )
+            master.data.updates.findBuilderId(name))
+
+    def getBuilds(self, master, buildids):
+        return self.successResultOf(defer.gatherResults([
+            master.db.builds.getBuild(buildid) for buildid in buildids
+        ]))
+
+    def addBuildset(self, master, builder_ids, properties=None):
+        properties = properties.asDict() if properties is not None else None
+        return master.data.updates.addBuildset(
+            waited_for=False,
+            builderids=builder_ids,
+            sourcestamps=SOURCESTAMPS,
+            properties=properties,
         )
 
+    def createBuildrequest(self, master, builder_ids, properties=None):
+        return self.successResultOf(
+            self.addBuildset(master, builder_ids, properties))
+
+    def createBuildrequests(self, master, builder_ids, count,
+                            properties=None):
+        return self.successResultOf(defer.gatherResults([
+            self.addBuildset(master, builder_ids, properties)
+            for _ in range(count)
+        ]))
+
+    def collectMessages(self, master, topic):
+        """
+        Return a list that gets filled with the bodies of the mq messages
+        matching ``topic``.
+        """
+        messages = []
+        self.successResultOf(master.mq.startConsuming(
+            lambda key, message: messages.append(message), topic))
+        return messages
+
+    def getLogsByFilename(self, master, logs):
+        """
+        Return the raw content of the given logs, keyed by log file name.
+        """
+        fulllogs = self.successResultOf(defer.gatherResults([
+            master.data.get(("logs", str(_log['logid']), "raw"))
+            for _log in logs
+        ]))
+        return {fulllog['filename']: fulllog['raw'] for fulllog in fulllogs}
+
     def test_latent_workers_start_in_parallel(self):
         """
         If there are two latent workers configured, and two build
@@ -112,23 +177,11 @@ class Tests(SynchronousTestCase):
             LatentController(self, 'local1'),
             LatentController(self, 'local2'),
         ]
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local1", "local2"],
-                              factory=BuildFactory()),
-            ],
-            'workers': [controller.worker for controller in controllers],
-            'protocols': {'null': {}},
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster(controllers)
+        builder_id = self.getBuilderId(master)
 
         # Request two builds.
-        for i in range(2):
-            self.createBuildrequest(master, [builder_id])
+        self.createBuildrequests(master, [builder_id], 2)
 
         # Check that both workers were requested to start.
         self.assertEqual(controllers[0].starting, True)
@@ -137,154 +190,89 @@ class Tests(SynchronousTestCase):
             controller.start_instance(True)
             controller.auto_stop(True)
 
-    def test_refused_substantiations_get_requeued(self):
+    def failSubstantiation(self, start_result, error_type):
         """
-        If a latent worker refuses to substantiate, the build request becomes unclaimed.
+        Request a build on a single latent worker and complete its
+        substantiation with ``start_result``, flushing the logged errors of
+        ``error_type``.
+
+        @returns: tuple of the master, the builder id, the ids of the
+            requested builds and the unclaimed build request messages
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller])
+        builder_id = self.getBuilderId(master)
 
         # Trigger a buildrequest
         bsid, brids = self.createBuildrequest(master, [builder_id])
 
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
+        unclaimed_build_requests = self.collectMessages(
+            master, ('buildrequests', None, 'unclaimed'))
 
+        controller.start_instance(start_result)
+        # Flush the errors logged by the failure.
+        self.flushLoggedErrors(error_type)
+        controller.auto_stop(True)
+        return master, builder_id, brids, unclaimed_build_requests
+
+    def test_refused_substantiations_get_requeued(self):
+        """
+        If a latent worker refuses to substantiate, the build request becomes unclaimed.
+        """
         # Indicate that the worker can't start an instance.
-        controller.start_instance(False)
+        master, builder_id, brids, unclaimed_build_requests = \
+            self.failSubstantiation(False, LatentWorkerFailedToSubstantiate)
 
         # When the substantiation fails, the buildrequest becomes unclaimed.
         self.assertEqual(
             set(brids),
-            {req['buildrequestid'] for req in unclaimed_build_requests}
+            set(map(itemgetter('buildrequestid'), unclaimed_build_requests))
         )
-        controller.auto_stop(True)
-        self.flushLoggedErrors(LatentWorkerFailedToSubstantiate)
 
     def test_failed_substantiations_get_requeued(self):
         """
         If a latent worker fails to substantiate, the build request becomes unclaimed.
         """
-        controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
-
-        # Trigger a buildrequest
-        bsid, brids = self.createBuildrequest(master, [builder_id])
-
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
-
         # The worker fails to substantiate.
-        controller.start_instance(
-            Failure(TestException("substantiation failed")))
-        # Flush the errors logged by the failure.
-        self.flushLoggedErrors(TestException)
+        master, builder_id, brids, unclaimed_build_requests = \
+            self.failSubstantiation(
+                Failure(TestException("substantiation failed")),
+                TestException)
 
         # When the substantiation fails, the buildrequest becomes unclaimed.
         self.assertEqual(
             set(brids),
-            {req['buildrequestid'] for req in unclaimed_build_requests}
+            set(map(itemgetter('buildrequestid'), unclaimed_build_requests))
         )
-        controller.auto_stop(True)
 
     def test_failed_substantiations_get_exception(self):
         """
         If a latent worker fails to substantiate, the result is an exception.
         """
-        controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
-
-        # Trigger a buildrequest
-        self.createBuildrequest(master, [builder_id])
-
         # The worker fails to substantiate.
-        controller.start_instance(
-            Failure(LatentWorkerCannotSubstantiate("substantiation failed")))
-        # Flush the errors logged by the failure.
-        self.flushLoggedErrors(LatentWorkerCannotSubstantiate)
+        master, builder_id, brids, unclaimed_build_requests = \
+            self.failSubstantiation(
+                Failure(LatentWorkerCannotSubstantiate("substantiation failed")),
+                LatentWorkerCannotSubstantiate)
 
         dbdict = self.successResultOf(
             master.db.builds.getBuildByNumber(builder_id, 1))
 
         # When the substantiation fails, the result is an exception.
         self.assertEqual(EXCEPTION, dbdict['results'])
-        controller.auto_stop(True)
 
     def test_worker_accepts_builds_after_failure(self):
         """
         If a latent worker fails to substantiate, the worker is still able to accept jobs.
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller])
+        builder_id = self.getBuilderId(master)
 
         controller.auto_stop(True)
         # Trigger a buildrequest
         bsid, brids = self.createBuildrequest(master, [builder_id])
 
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
         # The worker fails to substantiate.
         controller.start_instance(
             Failure(TestException("substantiation failed")))
@@ -323,31 +311,14 @@ class Tests(SynchronousTestCase):
         the builds proceed.
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy-1",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-                BuilderConfig(name="testy-2",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
+        master = self.getLatentMaster(
+            [controller], builder_names=['testy-1', 'testy-2'])
         builder_ids = [
-            self.successResultOf(master.data.updates.findBuilderId('testy-1')),
-            self.successResultOf(master.data.updates.findBuilderId('testy-2')),
+            self.getBuilderId(master, 'testy-1'),
+            self.getBuilderId(master, 'testy-2'),
         ]
 
-        finished_builds = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, build: finished_builds.append(build),
-            ('builds', None, 'finished')))
+        finished_builds = self.collectMessages(master, ('builds', None, 'finished'))
 
         # Trigger a buildrequest
         bsid, brids = self.createBuildrequest(master, builder_ids)
@@ -359,8 +330,8 @@ class Tests(SynchronousTestCase):
 
         # We check that there were two builds that finished, and
         # that they both finished with success
-        self.assertEqual([build['results']
-                          for build in finished_builds], [SUCCESS] * 2)
+        self.assertEqual(list(map(itemgetter('results'), finished_builds)),
+                         [SUCCESS] * 2)
         controller.auto_stop(True)
 
     def test_stalled_substantiation_then_timeout_get_requeued(self):
@@ -369,29 +340,14 @@ class Tests(SynchronousTestCase):
         the build request becomes unclaimed.
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller])
+        builder_id = self.getBuilderId(master)
 
         # Trigger a buildrequest
         bsid, brids = self.createBuildrequest(master, [builder_id])
 
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
+        unclaimed_build_requests = self.collectMessages(
+            master, ('buildrequests', None, 'unclaimed'))
 
         # We never start the worker, rather timeout it.
         master.reactor.advance(controller.worker.missing_timeout)
@@ -401,7 +357,7 @@ class Tests(SynchronousTestCase):
         # When the substantiation fails, the buildrequest becomes unclaimed.
         self.assertEqual(
             set(brids),
-            {req['buildrequestid'] for req in unclaimed_build_requests}
+            set(map(itemgetter('buildrequestid'), unclaimed_build_requests))
         )
         controller.auto_stop(True)
 
@@ -411,33 +367,15 @@ class Tests(SynchronousTestCase):
         the build request becomes unclaimed
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller])
+        builder_id = self.getBuilderId(master)
 
         # Trigger a buildrequest
         bsid, brids = self.createBuildrequest(master, [builder_id])
 
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
-        logs = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, log: logs.append(log),
-            ('logs', None, 'new')))
+        unclaimed_build_requests = self.collectMessages(
+            master, ('buildrequests', None, 'unclaimed'))
+        logs = self.collectMessages(master, ('logs', None, 'new'))
 
         # The worker succeed to substantiate
         def remote_setBuilderList(self, dirs):
@@ -453,15 +391,11 @@ class Tests(SynchronousTestCase):
         # When the substantiation fails, the buildrequest becomes unclaimed.
         self.assertEqual(
             set(brids),
-            {req['buildrequestid'] for req in unclaimed_build_requests}
+            set(map(itemgetter('buildrequestid'), unclaimed_build_requests))
         )
         # should get 2 logs (html and txt) with proper information in there
         self.assertEqual(len(logs), 2)
-        logs_by_name = {}
-        for _log in logs:
-            fulllog = self.successResultOf(
-                master.data.get(("logs", str(_log['logid']), "raw")))
-            logs_by_name[fulllog['filename']] = fulllog['raw']
+        logs_by_name = self.getLogsByFilename(master, logs)
 
         for i in ["err_text", "err_html"]:
             self.assertIn("can't create dir", logs_by_name[i])
@@ -476,33 +410,15 @@ class Tests(SynchronousTestCase):
         the build request becomes unclaimed
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller])
+        builder_id = self.getBuilderId(master)
 
         # Trigger a buildrequest
         bsid, brids = self.createBuildrequest(master, [builder_id])
 
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
-        logs = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, log: logs.append(log),
-            ('logs', None, 'new')))
+        unclaimed_build_requests = self.collectMessages(
+            master, ('buildrequests', None, 'unclaimed'))
+        logs = self.collectMessages(master, ('logs', None, 'new'))
 
         # The worker succeed to substantiate
         def remote_print(self, msg):
@@ -518,15 +434,11 @@ class Tests(SynchronousTestCase):
         # When the substantiation fails, the buildrequest becomes unclaimed.
         self.assertEqual(
             set(brids),
-            {req['buildrequestid'] for req in unclaimed_build_requests}
+            set(map(itemgetter('buildrequestid'), unclaimed_build_requests))
         )
         # should get 2 logs (html and txt) with proper information in there
         self.assertEqual(len(logs), 2)
-        logs_by_name = {}
-        for _log in logs:
-            fulllog = self.successResultOf(
-                master.data.get(("logs", str(_log['logid']), "raw")))
-            logs_by_name[fulllog['filename']] = fulllog['raw']
+        logs_by_name = self.getLogsByFilename(master, logs)
 
         for i in ["err_text", "err_html"]:
             self.assertIn("can't ping", logs_by_name[i])
@@ -542,69 +454,43 @@ class Tests(SynchronousTestCase):
         controller = LatentController(self, 'local', build_wait_timeout=0)
         # a step that we can finish when we want
         stepcontroller = BuildStepController()
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory([stepcontroller.step]),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller],
+                                      steps=[stepcontroller.step])
+        builder_id = self.getBuilderId(master)
+
+        build_messages = self.collectMessages(master, ('builds', None, None))
 
         # Request two builds.
-        for i in range(2):
-            self.createBuildrequest(master, [builder_id])
+        self.createBuildrequests(master, [builder_id], 2)
         controller.auto_stop(True)
 
         self.assertTrue(controller.starting)
         controller.start_instance(True)
         controller.connect_worker()
 
-        builds = self.successResultOf(
-            master.data.get(("builds",)))
-        self.assertEqual(builds[0]['results'], None)
+        # the last message sent about each build holds its current state
+        builds = {build['buildid']: build for build in build_messages}
+        self.assertEqual(builds[1]['results'], None)
         controller.disconnect_worker()
-        builds = self.successResultOf(
-            master.data.get(("builds",)))
-        self.assertEqual(builds[0]['results'], RETRY)
+        builds = {build['buildid']: build for build in build_messages}
+        self.assertEqual(builds[1]['results'], RETRY)
 
         # Request one build.
         self.createBuildrequest(master, [builder_id])
         controller.start_instance(True)
         controller.connect_worker()
-        builds = self.successResultOf(
-            master.data.get(("builds",)))
-        self.assertEqual(builds[1]['results'], None)
+        builds = {build['buildid']: build for build in build_messages}
+        self.assertEqual(builds[2]['results'], None)
         stepcontroller.finish_step(SUCCESS)
-        builds = self.successResultOf(
-            master.data.get(("builds",)))
-        self.assertEqual(builds[1]['results'], SUCCESS)
+        builds = {build['buildid']: build for build in build_messages}
+        self.assertEqual(builds[2]['results'], SUCCESS)
 
     def test_build_stop_with_cancelled_during_substantiation(self):
         """
         If a build is stopping during latent worker substantiating, the build becomes cancelled
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
+        master = self.getLatentMaster([controller])
         builder = master.botmaster.builders['testy']
         builder_id = self.successResultOf(builder.getBuilderId())
 
@@ -629,29 +515,15 @@ class Tests(SynchronousTestCase):
         If master is shutting down during latent worker substantiating, the build becomes retry.
         """
         controller = LatentController(self, 'local')
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory(),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            # Disable checks about missing scheduler.
-            'multiMaster': True,
-        }
-        master = self.getMaster(config_dict)
+        master = self.getLatentMaster([controller])
         builder = master.botmaster.builders['testy']
         builder_id = self.successResultOf(builder.getBuilderId())
 
         # Trigger a buildrequest
         _, brids = self.createBuildrequest(master, [builder_id])
 
-        unclaimed_build_requests = []
-        self.successResultOf(master.mq.startConsuming(
-            lambda key, request: unclaimed_build_requests.append(request),
-            ('buildrequests', None, 'unclaimed')))
+        unclaimed_build_requests = self.collectMessages(
+            master, ('buildrequests', None, 'unclaimed'))
 
         # Stop the build
         build = builder.getBuild(0)
@@ -666,39 +538,28 @@ class Tests(SynchronousTestCase):
         self.assertEqual(RETRY, dbdict['results'])
         self.assertEqual(
             set(brids),
-            {req['buildrequestid'] for req in unclaimed_build_requests}
+            set(map(itemgetter('buildrequestid'), unclaimed_build_requests))
         )
         controller.auto_stop(True)
         self.flushLoggedErrors(LatentWorkerFailedToSubstantiate)
 
-    def test_rejects_build_on_instance_with_different_type_timeout_zero(self):
+    def switchWorkerKind(self, build_wait_timeout):
         """
-        If latent worker supports getting its instance type from properties that
-        are rendered from build then the buildrequestdistributor must not
-        schedule any builds on workers that are running different instance type
-        than what these builds will require.
+        Run a build on a latent worker started with the kind 'a', and before
+        it finishes request a build that requires the kind 'b'.
+
+        @returns: tuple of the latent controller, the step controller and the
+            master
         """
         controller = LatentController(self, 'local',
                                       kind=Interpolate('%(prop:worker_kind)s'),
-                                      build_wait_timeout=0)
+                                      build_wait_timeout=build_wait_timeout)
 
         # a step that we can finish when we want
         stepcontroller = BuildStepController()
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory([stepcontroller.step]),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            'multiMaster': True,
-        }
-
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
+        master = self.getLatentMaster([controller],
+                                      steps=[stepcontroller.step])
+        builder_id = self.getBuilderId(master)
 
         # create build request
         self.createBuildrequest(master, [builder_id],
@@ -726,16 +587,27 @@ class Tests(SynchronousTestCase):
         # maybe substantiate it for the pending build the builds on worker
         self.reactor.advance(0.1)
 
+        return controller, stepcontroller, master
+
+    def test_rejects_build_on_instance_with_different_type_timeout_zero(self):
+        """
+        If latent worker supports getting its instance type from properties that
+        are rendered from build then the buildrequestdistributor must not
+        schedule any builds on workers that are running different instance type
+        than what these builds will require.
+        """
+        controller, stepcontroller, master = self.switchWorkerKind(
+            build_wait_timeout=0)
+
         # verify that the second build restarted with the expected instance
         # kind
         self.assertEqual(self.successResultOf(controller.get_started_kind()),
                          'b')
         stepcontroller.finish_step(SUCCESS)
 
-        dbdict = self.successResultOf(master.db.builds.getBuild(1))
-        self.assertEqual(SUCCESS, dbdict['results'])
-        dbdict = self.successResultOf(master.db.builds.getBuild(2))
-        self.assertEqual(SUCCESS, dbdict['results'])
+        builds = self.getBuilds(master, [1, 2])
+        self.assertEqual(list(map(itemgetter('results'), builds)),
+                         [SUCCESS] * 2)
 
     def test_rejects_build_on_instance_with_different_type_timeout_nonzero(self):
         """
@@ -744,53 +616,8 @@ class Tests(SynchronousTestCase):
         schedule any builds on workers that are running different instance type
         than what these builds will require.
         """
-        controller = LatentController(self, 'local',
-                                      kind=Interpolate('%(prop:worker_kind)s'),
-                                      build_wait_timeout=5)
-
-        # a step that we can finish when we want
-        stepcontroller = BuildStepController()
-        config_dict = {
-            'builders': [
-                BuilderConfig(name="testy",
-                              workernames=["local"],
-                              factory=BuildFactory([stepcontroller.step]),
-                              ),
-            ],
-            'workers': [controller.worker],
-            'protocols': {'null': {}},
-            'multiMaster': True,
-        }
-
-        master = self.getMaster(config_dict)
-        builder_id = self.successResultOf(
-            master.data.updates.findBuilderId('testy'))
-
-        # create build request
-        self.createBuildrequest(master, [builder_id],
-                                properties=Properties(worker_kind='a'))
-
-        # start the build and verify the kind of the worker. Note that the
-        # buildmaster needs to restart the worker in order to change the worker
-        # kind, so we allow it both to auto start and stop
-        self.assertEqual(True, controller.starting)
-
-        controller.auto_connect_worker = True
-        controller.auto_disconnect_worker = True
-        controller.auto_start(True)
-        controller.auto_stop(True)
-        controller.connect_worker()
-        self.assertEqual(self.successResultOf(controller.get_started_kind()),
-                         'a')
-
-        # before the other build finished, create another build request
-        self.createBuildrequest(master, [builder_id],
-                                properties=Properties(worker_kind='b'))
-        stepcontroller.finish_step(SUCCESS)
-
-        # give the botmaster chance to insubstantiate the worker and
-        # maybe substantiate it for the pending build the builds on worker
-        self.reactor.advance(0.1)
+        controller, stepcontroller, master = self.switchWorkerKind(
+            build_wait_timeout=5)
 
         # verify build has not started, even though the worker is waiting
         # for one
@@ -799,7 +626,7 @@ class Tests(SynchronousTestCase):
 
         # wait until the latent worker times out, is insubstantiated,
         # is substantiated because of pending buildrequest and starts the build
-        self.reactor.advance(6)
+        self.reactor.advance(controller.build_wait_timeout)
         self.assertIsNotNone(self.successResultOf(master.db.builds.getBuild(2)))
 
         # verify that the second build restarted with the expected instance
@@ -808,7 +635,6 @@ class Tests(SynchronousTestCase):
                          'b')
         stepcontroller.finish_step(SUCCESS)
 
-        dbdict = self.successResultOf(master.db.builds.getBuild(1))
-        self.assertEqual(SUCCESS, dbdict['results'])
-        dbdict = self.successResultOf(master.db.builds.getBuild(2))
-        self.assertEqual(SUCCESS, dbdict['results'])
+        builds = self.getBuilds(master, [1, 2])
+        self.assertEqual(list(map(itemgetter('results'), builds)),
+                         [SUCCESS] * 2)
@@ -1127,9 +1127,11 @@ class TestBuildProperties(unittest.TestCase):
         self.properties.hasProperty.assert_called_with('p')
 
     def test_has_key(self):
-        self.properties.has_key.return_value = True
-        # getattr because pep8 doesn't like calls to has_key
-        self.assertTrue(getattr(self.build, 'has_key')('p'))
+        self.properties.hasProperty.return_value = True
+        with assertProducesWarning(DeprecationWarning,
+                                   message_pattern="use hasProperty"):
+            # getattr because pep8 doesn't like calls to has_key
+            self.assertTrue(getattr(self.build, 'has_key')('p'))
         # has_key calls through to hasProperty
         self.properties.hasProperty.assert_called_with('p')
 
@@ -1023,6 +1023,13 @@ class TestProperties(unittest.TestCase):
     def test_has_key_false(self):
         self.assertFalse('x' in self.props)
 
+    def test_has_key_deprecated(self):
+        self.props.properties['x'] = (False, 'test')
+        with assertProducesWarning(DeprecationWarning,
+                                   message_pattern="use hasProperty"):
+            # getattr because pep8 doesn't like calls to has_key
+            self.assertTrue(getattr(self.props, 'has_key')('x'))
+
     def test_setProperty(self):
         self.props.setProperty('x', 'y', 'test')
         self.assertEqual(self.props.properties['x'], ('y', 'test'))
@@ -1115,8 +1122,10 @@ class TestPropertiesMixin(unittest.TestCase):
 
     def test_has_key(self):
         self.mp.properties.hasProperty.return_value = True
-        # getattr because pep8 doesn't like calls to has_key
-        self.assertTrue(getattr(self.mp, 'has_key')('abc'))
+        with assertProducesWarning(DeprecationWarning,
+                                   message_pattern="use hasProperty"):
+            # getattr because pep8 doesn't like calls to has_key
+            self.assertTrue(getattr(self.mp, 'has_key')('abc'))
         self.mp.properties.hasProperty.assert_called_with('abc')
 
     def test_setProperty(self):
@@ -28,7 +28,7 @@ from zope.interface import implementer
 
 from buildbot.interfaces import ILatentWorker
 from buildbot.interfaces import LatentWorkerFailedToSubstantiate
-from buildbot.interfaces import LatentWorkerSubstantiatiationCancelled
+from buildbot.interfaces import LatentWorkerSubstantiationCancelled
 from buildbot.util import Notifier
 from buildbot.util import asyncSleep
 from buildbot.worker.base import AbstractWorker
@@ -265,7 +265,7 @@ class AbstractLatentWorker(AbstractWorker):
         self.insubstantiating = False
         if self._substantiation_notifier:
             self._substantiation_notifier.notify(
-                failure.Failure(LatentWorkerSubstantiatiationCancelled()))
+                failure.Failure(LatentWorkerSubstantiationCancelled()))
         self.botmaster.maybeStartBuildsForWorker(self.name)
 
     @defer.inlineCallbacks